@@ -0,0 +1,101 @@
+import logging
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = 'bot.db'
+
+DAILY_RETENTION_DAYS = int(os.getenv("DAILY_RETENTION_DAYS", 90))  # Сколько дней хранить дневные счётчики
+
+# Глобальные счётчики показов по названию: всё время и по дням (UTC).
+# Индексы по count позволяют читать топ-k без GROUP BY по всей таблице stats.
+SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS title_totals
+       (title TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0)''',
+    '''CREATE INDEX IF NOT EXISTS title_totals_count ON title_totals (count DESC)''',
+    '''CREATE TABLE IF NOT EXISTS title_daily
+       (day TEXT,
+        title TEXT,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, title))''',
+    '''CREATE INDEX IF NOT EXISTS title_daily_count ON title_daily (day, count DESC)''',
+)
+
+BUMP_TOTAL = """INSERT INTO title_totals (title, count) VALUES (?, 1)
+                ON CONFLICT(title) DO UPDATE SET count = count + 1"""
+BUMP_DAILY = """INSERT INTO title_daily (day, title, count) VALUES (date('now'), ?, 1)
+                ON CONFLICT(day, title) DO UPDATE SET count = count + 1"""
+PRUNE_DAILY = "DELETE FROM title_daily WHERE day < date('now', ?)"
+
+_last_prune_day = None  # Дата (UTC), когда старые дневные счётчики удалялись в последний раз
+
+
+async def init_aggregates(db_path: str = DB_PATH):
+    '''Создание таблиц глобальной статистики.'''
+    async with aiosqlite.connect(db_path) as db:
+        for statement in SCHEMA:
+            await db.execute(statement)
+        await db.commit()
+
+
+async def bump_titles(db: aiosqlite.Connection, titles: list):
+    """
+    Increment global and today's counters for the shown titles.
+    Runs on the caller's connection so it commits together with the per-user stats upsert.
+    Buckets older than DAILY_RETENTION_DAYS are dropped on the first bump of each day.
+    """
+    global _last_prune_day
+    today = datetime.now(timezone.utc).date()
+    if _last_prune_day != today:
+        await db.execute(PRUNE_DAILY, (f"-{DAILY_RETENTION_DAYS} days",))
+        _last_prune_day = today
+    for title in titles:
+        await db.execute(BUMP_TOTAL, (title,))
+        await db.execute(BUMP_DAILY, (title,))
+
+
+async def top_titles(limit: int = 10, today: bool = False, db_path: str = DB_PATH):
+    """Top `limit` (title, count) pairs, all-time or for the current UTC day."""
+    async with aiosqlite.connect(db_path) as db:
+        if today:
+            sql, params = ("SELECT title, count FROM title_daily WHERE day = date('now') "
+                           "ORDER BY count DESC LIMIT ?"), (limit,)
+        else:
+            sql, params = "SELECT title, count FROM title_totals ORDER BY count DESC LIMIT ?", (limit,)
+        async with db.execute(sql, params) as cursor:
+            return await cursor.fetchall()
+
+
+def rebuild(db_path: str = DB_PATH):
+    """
+    Backfill the aggregates from scratch.
+
+    title_totals is summed exactly from stats. stats has no timestamps and history does not record which
+    titles were shown, so past daily buckets cannot be reconstructed: title_daily keeps only what live
+    traffic has counted, trimmed to DAILY_RETENTION_DAYS.
+    """
+    db = sqlite3.connect(db_path)
+    try:
+        for statement in SCHEMA:
+            db.execute(statement)
+        db.execute("DELETE FROM title_totals")
+        db.execute(PRUNE_DAILY, (f"-{DAILY_RETENTION_DAYS} days",))
+        db.execute("INSERT INTO title_totals (title, count) SELECT title, SUM(count) FROM stats GROUP BY title")
+        db.commit()
+
+        totals = db.execute("SELECT COUNT(*) FROM title_totals").fetchone()[0]
+        logger.info(f"Aggregates rebuilt: {totals} titles, {DAILY_RETENTION_DAYS} days of daily buckets kept")
+    finally:
+        db.close()
+
+
+if __name__ == '__main__':
+    # python aggregates.py [bot.db]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    rebuild(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
@@ -0,0 +1,52 @@
+"""
+Page-load benchmark for the Selenium scraper: "full" vs "lean" profile.
+
+Runs the same queries through search.search_films under both profiles and reports per-query load time
+(driver.get until the result container is in the DOM) and bytes transferred (Resource Timing API, so
+cross-origin resources without Timing-Allow-Origin count as 0). Point KINOGO_URL at the local stub site
+to get reproducible numbers.
+
+Usage: KINOGO_URL=http://127.0.0.1:8000 python bench_scraper.py [runs] [query ...]
+"""
+import asyncio
+import statistics
+import sys
+
+import search
+
+DEFAULT_QUERIES = ["Venom", "остров собак", "магия лунного света"]
+PROFILES = ("full", "lean")
+
+
+async def bench_profile(profile: str, queries: list, runs: int):
+    search.SCRAPER_PROFILE = profile
+    search.shutdown()  # Драйверы в пуле созданы под прежний профиль
+    await asyncio.to_thread(search.warm_up)  # Запуск браузера не входит в замер
+
+    rows = []
+    for query in queries:
+        times, sizes, found = [], [], 0
+        for _ in range(runs):
+            search.last_load.clear()
+            found = len(await search.search_films(query) or [])
+            if search.last_load:
+                times.append(search.last_load["load_ms"])
+                sizes.append(search.last_load["bytes"] or 0)
+        if times:
+            rows.append((query, statistics.median(times), statistics.median(sizes) / 1024, found))
+    search.shutdown()
+    return rows
+
+
+async def main(runs: int, queries: list):
+    print(f"site: {search.KINOGO_URL}, runs per query: {runs}")
+    for profile in PROFILES:
+        print(f"\n[{profile}]")
+        for query, load_ms, size_kb, found in await bench_profile(profile, queries, runs):
+            print(f"  {query:<30} {load_ms:8.0f} ms {size_kb:9.0f} KB  results: {found}")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    runs = int(args.pop(0)) if args and args[0].isdigit() else 3
+    asyncio.run(main(runs, args or DEFAULT_QUERIES))
@@ -0,0 +1,69 @@
+"""
+Startup benchmark for bot.py.
+
+Measures, in fresh interpreters, how long `import bot` takes and how long the blocking startup hooks
+(init_db, load_catalog) take before polling can begin, i.e. before the bot can answer /start or /help.
+The background warm-up is not part of this time. Fails if the median import exceeds the budget or if
+the scraping stack got imported eagerly.
+
+Usage: python bench_startup.py [runs]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+IMPORT_BUDGET_MS = 1500  # Бюджет на import bot, мс
+HEAVY_MODULES = ("selenium", "webdriver_manager", "bs4")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+PROBE = """
+import asyncio, sys, time
+t0 = time.perf_counter()
+import bot
+t1 = time.perf_counter()
+asyncio.run(bot.init_db())
+asyncio.run(bot.load_catalog())
+t2 = time.perf_counter()
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print((t1 - t0) * 1000, (t2 - t1) * 1000, ",".join(heavy) or "-")
+"""
+
+
+def run_probe(workdir: str):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, TOKEN=os.getenv("TOKEN", "123456:bench-token"))
+    out = subprocess.run([sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)], cwd=workdir, env=env,
+                         capture_output=True, text=True, check=True).stdout.split()[-3:]
+    return float(out[0]), float(out[1]), out[2]
+
+
+def main(runs: int = 10):
+    imports, hooks, heavy = [], [], set()
+    with tempfile.TemporaryDirectory() as workdir:  # bot.db создаётся во временной папке
+        for _ in range(runs):
+            import_ms, hooks_ms, loaded = run_probe(workdir)
+            imports.append(import_ms)
+            hooks.append(hooks_ms)
+            if loaded != "-":
+                heavy.update(loaded.split(","))
+
+    import_median, hooks_median = statistics.median(imports), statistics.median(hooks)
+    print(f"runs: {runs}")
+    print(f"import bot:     median {import_median:.1f} ms, max {max(imports):.1f} ms (budget {IMPORT_BUDGET_MS} ms)")
+    print(f"startup hooks:  median {hooks_median:.1f} ms, max {max(hooks):.1f} ms")
+    print(f"ready to reply: median {import_median + hooks_median:.1f} ms")
+
+    ok = True
+    if heavy:
+        print(f"FAIL: imported eagerly: {', '.join(sorted(heavy))}")
+        ok = False
+    if import_median > IMPORT_BUDGET_MS:
+        print("FAIL: import budget exceeded")
+        ok = False
+    return 0 if ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -1,16 +1,36 @@
 import asyncio
 import os
+import time
 
 import aiosqlite
 from aiogram import Bot, Dispatcher, types
 from aiogram.filters import Command
+from aiogram.filters.callback_data import CallbackData
+from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from search import search_films
+from aggregates import bump_titles, init_aggregates, top_titles
+from cache import cached_search, init_cache, prewarm_loop
+from catalog import CATALOG_PATH, Catalog
+from fetcher import fetch_films
+from pages import ResultStore
+from search import shutdown as shutdown_scraper, warm_up as warm_up_scraper
 
 # Инициализация бота и диспетчера
 bot = Bot(token=os.getenv("TOKEN"))  # Токен берётся из переменной окружения
 dp = Dispatcher()
 
+catalog = None  # Catalog, отображённый в память при старте (если снапшот есть)
+warm_up_task = None  # Фоновый прогрев, запускается в start_warm_up
+prewarm_task = None  # Периодический прогрев кэша популярных запросов
+
+RES_CNT = 5  # Кол-во результатов на странице поиска, max=10
+result_store = ResultStore()  # Полные результаты поиска для кнопки «Ещё»
+
+
+class MoreCallback(CallbackData, prefix="more"):
+    token: str  # Ключ результатов в result_store
+    offset: int  # С какого фильма показывать следующую страницу
+
 
 # --- Функции работы с базой данных ---
 
@@ -31,6 +51,51 @@ async def init_db():
                              count INTEGER DEFAULT 1,
                              UNIQUE(user_id, title))''')
         await db.commit()
+    await init_cache()
+    await init_aggregates()
+
+
+async def load_catalog():
+    '''Отображение снапшота каталога в память. Без снапшота бот работает только через поиск на сайте.'''
+    global catalog
+    if not os.path.exists(CATALOG_PATH):
+        return
+    try:
+        catalog = Catalog.load(CATALOG_PATH)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось загрузить каталог {CATALOG_PATH}: {e}")
+
+
+async def warm_up():
+    '''Прогрев тяжёлых частей: индекс каталога, импорт selenium/bs4 и запуск браузера.'''
+    started = time.perf_counter()
+    if catalog is not None:
+        await asyncio.to_thread(catalog.build_search_index)
+    try:
+        await asyncio.to_thread(warm_up_scraper)
+    except Exception as e:
+        print(f"Прогрев браузера не удался, он будет запущен при первом поиске: {e}")
+    print(f"Прогрев завершён за {time.perf_counter() - started:.2f} с")
+
+
+async def start_warm_up():
+    '''Запуск прогрева в фоне, чтобы бот сразу начал отвечать на /start и /help.'''
+    global warm_up_task
+    warm_up_task = asyncio.create_task(warm_up())
+
+
+async def start_prewarm():
+    '''Запуск фонового обновления кэша для самых частых запросов из history.'''
+    global prewarm_task
+    prewarm_task = asyncio.create_task(prewarm_loop(fetch_films))
+
+
+async def stop_scraper():
+    if prewarm_task is not None:
+        prewarm_task.cancel()
+    if warm_up_task is not None:
+        await warm_up_task
+    await asyncio.to_thread(shutdown_scraper)
 
 
 # --- Вспомогательные функции для отображения данных ---
@@ -64,6 +129,26 @@ async def show_stats(message: types.Message, user_id: int):
     await message.reply(text, parse_mode='HTML')
 
 
+async def show_top(message: types.Message):
+    # Отображение глобального топа фильмов за всё время и за сегодня
+    all_time = await top_titles(10)
+    today = await top_titles(10, today=True)
+
+    if not all_time:
+        await message.reply("🥲 Пока никто ничего не искал.")
+        return
+
+    text = "Чаще всего предлагались:\n"
+    for title, count in all_time:
+        text += f"<code>{title}</code>: {count} раз(а)\n"
+    if today:
+        text += "\nСегодня:\n"
+        for title, count in today:
+            text += f"<code>{title}</code>: {count} раз(а)\n"
+
+    await message.reply(text, parse_mode='HTML')
+
+
 # --- Обработчики команд ---
 
 @dp.message(Command('start'))
@@ -89,6 +174,7 @@ async def help_command(message: types.Message):
                  "/help -Справка (это сообщение)\n"
                  "/history - История поиска\n"
                  "/stats - Статистика фильмов по поиску\n"
+                 "/top - Популярные фильмы среди всех пользователей\n"
                  "Чтобы найти фильм, просто отправьте его название")
     await message.reply(help_text)
 
@@ -105,36 +191,35 @@ async def stats_command(message: types.Message):
     await show_stats(message, user_id)
 
 
-# --- Обработчик текстовых сообщений (поиск) ---
-
-from aiogram.types import InputMediaPhoto
+@dp.message(Command('top'))
+async def top_command(message: types.Message):
+    await show_top(message)
 
 
-@dp.message()
-async def search_film(message: types.Message):
-    """Обработка текстовых сообщений как асинхронных поисковых запросов и отправка send_media_group."""
+# --- Обработчик текстовых сообщений (поиск) ---
 
-    RES_CNT = 5  # Кол-во результатов в поске, max=10
+from aiogram.types import InputMediaPhoto
 
-    query = message.text
-    user_id = message.from_user.id
 
-    # Логируем запрос в истории
+async def update_stats(user_id: int, films: list):
+    # Обновляем БД по показанным фильмам
     async with aiosqlite.connect('bot.db') as db:
-        await db.execute("INSERT INTO history (user_id, query) VALUES (?, ?)", (user_id, query))
+        for film in films:
+            await db.execute("""
+                INSERT INTO stats (user_id, title, count) VALUES (?, ?, 1) ON CONFLICT(user_id, title) DO UPDATE SET count = count + 1
+            """, (user_id, film['name']))
+        # Глобальные счётчики обновляются в той же транзакции
+        await bump_titles(db, [film['name'] for film in films])
         await db.commit()
 
-    searching = await message.reply(f"🔍 Ищу «{query}»...")
-    films = await search_films(query)
 
-    if not films:
-        await bot.edit_message_text(text="❌ Ничего не найдено.", chat_id=searching.chat.id,
-            message_id=searching.message_id)
-        return
+async def send_page(chat_id: int, user_id: int, films: list, offset: int, token: str):
+    """Отправка страницы результатов films[offset:offset + RES_CNT] и кнопки «Ещё», если фильмы остались."""
+    page = films[offset:offset + RES_CNT]
 
-    # Собираем mediagroup и обновляем статистику
+    # Собираем mediagroup
     media = []
-    for film in films[:RES_CNT]:
+    for film in page:
         poster = film['posters'][0] if film['posters'] else None
         if poster:
             caption = (f"<b>{film['name']}</b>\n"
@@ -145,29 +230,84 @@ async def search_film(message: types.Message):
                        )
             media.append(InputMediaPhoto(media=poster, caption=caption, parse_mode='HTML'))
 
-    # Заменяем сообщение «ищем»
-    await bot.edit_message_text(text="🐈 Вот что я нашёл:", chat_id=searching.chat.id, message_id=searching.message_id)
-
     # Отправляем mediagroup
     if media:
-        await bot.send_media_group(chat_id=message.chat.id, media=media)
+        await bot.send_media_group(chat_id=chat_id, media=media)
     else:
-        await message.reply("😥 К сожалению, нет доступных постеров для отправки.")
+        await bot.send_message(chat_id=chat_id, text="😥 К сожалению, нет доступных постеров для отправки.")
+
+    # К альбому нельзя прикрепить клавиатуру, поэтому кнопка идёт отдельным сообщением
+    next_offset = offset + RES_CNT
+    if next_offset < len(films):
+        builder = InlineKeyboardBuilder()
+        builder.button(text=f"Ещё {min(RES_CNT, len(films) - next_offset)} ▶️",
+                       callback_data=MoreCallback(token=token, offset=next_offset))
+        await bot.send_message(chat_id=chat_id, text=f"Показано {next_offset} из {len(films)}.",
+                               reply_markup=builder.as_markup())
+
+    await update_stats(user_id, page)
+
 
-    # Обновляем БД по найденым фильмам
-    film_titles = [film['name'] for film in films[:RES_CNT]]
+@dp.message()
+async def search_film(message: types.Message):
+    """Обработка текстовых сообщений как асинхронных поисковых запросов и отправка send_media_group."""
+
+    query = message.text
+    user_id = message.from_user.id
+
+    # Логируем запрос в истории
     async with aiosqlite.connect('bot.db') as db:
-        for title in film_titles:
-            await db.execute("""
-                INSERT INTO stats (user_id, title, count) VALUES (?, ?, 1) ON CONFLICT(user_id, title) DO UPDATE SET count = count + 1
-            """, (user_id, title))
+        await db.execute("INSERT INTO history (user_id, query) VALUES (?, ?)", (user_id, query))
         await db.commit()
 
+    searching = await message.reply(f"🔍 Ищу «{query}»...")
+    films = await cached_search(query, fetch_films)
+    failed = films is None
+    if not films and catalog is not None:
+        # Сайт ничего не вернул - ищем в локальном каталоге
+        films = [film.as_dict() for film in catalog.search(query)]
+
+    if not films:
+        text = "⚠️ Не удалось выполнить поиск, попробуйте позже." if failed else "❌ Ничего не найдено."
+        await bot.edit_message_text(text=text, chat_id=searching.chat.id, message_id=searching.message_id)
+        return
+
+    # Заменяем сообщение «ищем»
+    await bot.edit_message_text(text="🐈 Вот что я нашёл:", chat_id=searching.chat.id, message_id=searching.message_id)
+
+    # Полный результат сохраняем, чтобы следующие страницы брались из памяти без нового поиска
+    token = result_store.put(films) if len(films) > RES_CNT else ""
+    await send_page(message.chat.id, user_id, films, 0, token)
+
+
+@dp.callback_query(MoreCallback.filter())
+async def more_results(callback: types.CallbackQuery, callback_data: MoreCallback):
+    """Кнопка «Ещё»: следующая страница из сохранённых результатов."""
+    films = result_store.get(callback_data.token)
+    if films is None:
+        await callback.answer("⌛ Результаты устарели, повторите поиск.", show_alert=True)
+        await callback.message.edit_reply_markup(reply_markup=None)
+        return
+
+    # Отмечаем страницу до первого await: повторное нажатие или подделанный offset её не получат
+    if not result_store.claim_page(callback_data.token, callback_data.offset, RES_CNT):
+        await callback.answer()
+        return
+
+    await callback.answer()
+    # Убираем кнопку, страница уже показана
+    await callback.message.edit_reply_markup(reply_markup=None)
+    await send_page(callback.message.chat.id, callback.from_user.id, films, callback_data.offset, callback_data.token)
+
 
 # --- Запуск бота ---
 
 # Регистрация функции инициализации базы данных при запуске
 dp.startup.register(init_db)
+dp.startup.register(load_catalog)
+dp.startup.register(start_warm_up)
+dp.startup.register(start_prewarm)
+dp.shutdown.register(stop_scraper)
 
 if __name__ == '__main__':
     # Запуск бота с использованием asyncio
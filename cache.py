@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+
+import aiosqlite
+
+logger = logging.getLogger(__name__)
+
+DB_PATH = 'bot.db'
+
+CACHE_TTL = int(os.getenv("CACHE_TTL", 6 * 3600))  # Сколько секунд результат поиска считается свежим
+NEGATIVE_CACHE_TTL = int(os.getenv("NEGATIVE_CACHE_TTL", 30 * 60))  # То же для пустого результата
+
+# Настройки фонового прогрева популярных запросов
+PREWARM_INTERVAL = int(os.getenv("PREWARM_INTERVAL", 600))  # Период между раундами, с
+PREWARM_TOP_N = int(os.getenv("PREWARM_TOP_N", 20))  # Сколько самых частых запросов поддерживать тёплыми
+PREWARM_WINDOW_HOURS = int(os.getenv("PREWARM_WINDOW_HOURS", 24))  # Окно истории для подсчёта популярности
+PREWARM_BUDGET = int(os.getenv("PREWARM_BUDGET", 5))  # Максимум скрейпов за раунд
+PREWARM_IDLE_SECONDS = int(os.getenv("PREWARM_IDLE_SECONDS", 60))  # Раунд ждёт, пока пользователи молчат столько
+
+
+def normalize_query(query: str) -> str:
+    """Ключ кэша: нижний регистр, ё→е, схлопнутые пробелы."""
+    return re.sub(r"\s+", " ", query.lower().replace("ё", "е")).strip()
+
+
+async def init_cache(db_path: str = DB_PATH):
+    '''Создание таблицы кэша результатов поиска.'''
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute('''CREATE TABLE IF NOT EXISTS search_cache
+                            (query TEXT PRIMARY KEY,
+                             results TEXT,
+                             updated_at REAL)''')
+        # popular_queries и _users_idle фильтруют history по времени
+        await db.execute("CREATE INDEX IF NOT EXISTS history_timestamp ON history (timestamp)")
+        await db.commit()
+
+
+async def get_cached(query: str, db_path: str = DB_PATH):
+    """Свежий результат из кэша или None."""
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute("SELECT results, updated_at FROM search_cache WHERE query = ?",
+                              (normalize_query(query),)) as cursor:
+            row = await cursor.fetchone()
+    if row is None:
+        return None
+    films = json.loads(row[0])
+    if time.time() - row[1] > (CACHE_TTL if films else NEGATIVE_CACHE_TTL):
+        return None
+    return films
+
+
+async def put_cached(query: str, films: list, db_path: str = DB_PATH):
+    async with aiosqlite.connect(db_path) as db:
+        await db.execute("INSERT OR REPLACE INTO search_cache (query, results, updated_at) VALUES (?, ?, ?)",
+                         (normalize_query(query), json.dumps(films, ensure_ascii=False), time.time()))
+        await db.commit()
+
+
+async def cached_search(query: str, search, db_path: str = DB_PATH):
+    """
+    Search through the cache: return a fresh cached result or call `search(query)` and store the result.
+    Genuine empty results are cached for NEGATIVE_CACHE_TTL only; a failed search (None) is not cached.
+
+    Args:
+        query (str): Search query as typed by the user
+        search: Coroutine function with the search.search_films signature
+    """
+    films = await get_cached(query, db_path)
+    if films is not None:
+        return films
+    films = await search(query)
+    if films is not None:
+        await put_cached(query, films, db_path)
+    return films
+
+
+# --- Прогрев популярных запросов ---
+
+async def popular_queries(limit: int = PREWARM_TOP_N, window_hours: int = PREWARM_WINDOW_HOURS,
+                          db_path: str = DB_PATH):
+    """Top `limit` normalized queries from history over the last `window_hours`, most frequent first."""
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute("SELECT query, COUNT(*) FROM history WHERE timestamp >= datetime('now', ?) "
+                              "GROUP BY query", (f"-{window_hours} hours",)) as cursor:
+            rows = await cursor.fetchall()
+
+    counts = Counter()
+    for query, count in rows:
+        if query:
+            counts[normalize_query(query)] += count
+    return [query for query, _ in counts.most_common(limit) if query]
+
+
+async def _users_idle(db_path: str = DB_PATH) -> bool:
+    async with aiosqlite.connect(db_path) as db:
+        async with db.execute("SELECT COUNT(*) FROM history WHERE timestamp >= datetime('now', ?)",
+                              (f"-{PREWARM_IDLE_SECONDS} seconds",)) as cursor:
+            (recent,) = await cursor.fetchone()
+    return recent == 0
+
+
+async def prewarm_once(search, budget: int = PREWARM_BUDGET, refresh_ahead: int = 2 * PREWARM_INTERVAL,
+                       db_path: str = DB_PATH) -> int:
+    """
+    Refresh cached results of popular queries that are missing or expire within `refresh_ahead` seconds.
+    Queries that came back empty are retried only after NEGATIVE_CACHE_TTL, so they do not eat the budget.
+    A failed or empty refresh never replaces a non-empty cached result.
+    Spends at most `budget` scrapes, most popular queries first. Returns the number of refreshed queries.
+
+    The search runs in a worker thread with its own event loop: the Selenium tier blocks, and the
+    background job must not stall the bot's handlers.
+    """
+    queries = await popular_queries(db_path=db_path)
+    if not queries:
+        return 0
+
+    async with aiosqlite.connect(db_path) as db:
+        marks = ", ".join("?" * len(queries))
+        async with db.execute(f"SELECT query, updated_at, results = '[]' FROM search_cache "
+                              f"WHERE query IN ({marks})", queries) as cursor:
+            cached = {query: (updated_at, empty) for query, updated_at, empty in await cursor.fetchall()}
+
+    now = time.time()
+    deadline = now + refresh_ahead - CACHE_TTL  # Всё, что обновлено раньше, истечёт до следующих раундов
+    refreshed = 0
+    for query in queries:
+        if refreshed >= budget:
+            break
+        updated_at, empty = cached.get(query, (0, False))
+        if updated_at > (now - NEGATIVE_CACHE_TTL if empty else deadline):
+            continue
+        films = await asyncio.to_thread(lambda q=query: asyncio.run(search(q)))
+        refreshed += 1
+        if films is None or (not films and updated_at and not empty):
+            # Пусть пользователи дальше получают старый результат, пока он не истечёт
+            continue
+        await put_cached(query, films, db_path)
+    if refreshed:
+        logger.info(f"Cache prewarm: refreshed {refreshed} of {len(queries)} popular queries")
+    return refreshed
+
+
+async def prewarm_loop(search, interval: int = PREWARM_INTERVAL, db_path: str = DB_PATH):
+    """
+    Background scheduler: every `interval` seconds run prewarm_once.
+    A round is deferred while users are searching, but for no longer than another `interval`.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            waited = 0
+            while waited < interval and not await _users_idle(db_path):
+                await asyncio.sleep(PREWARM_IDLE_SECONDS)
+                waited += PREWARM_IDLE_SECONDS
+            await prewarm_once(search, db_path=db_path)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache prewarm failed: {e}")
@@ -0,0 +1,294 @@
+import array
+import logging
+import math
+import mmap
+import os
+import re
+import sqlite3
+import struct
+import sys
+
+logger = logging.getLogger(__name__)
+
+# Snapshot layout (little-endian, every section 4-byte aligned):
+#   header   : magic, version, n_films, n_strings
+#   offsets  : uint32[n_strings + 1]  - byte offsets of strings inside the blob
+#   name_idx, desc_idx, link_idx, poster_idx : uint32[n_films] each
+#   kp, imdb : float32[n_films] each (NaN = no rating)
+#   years    : uint16[n_films] (0 = unknown), padded to 4 bytes
+#   blob     : UTF-8 string pool, every distinct string stored once
+SNAPSHOT_MAGIC = b"CBCAT\0"
+SNAPSHOT_VERSION = 1
+_HEADER = struct.Struct("<6sHII")
+
+# Где лежит снапшот: и краулер (something/parser.py), и бот используют этот путь.
+# По умолчанию - рядом с этим модулем, независимо от рабочей папки процесса.
+CATALOG_PATH = os.getenv("CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "films.cat"))
+
+NO_STRING = 0  # index 0 in the pool is always the empty string
+
+
+class FilmRecord:
+    """Lightweight view of one catalog row. Fields are resolved on construction from the catalog columns."""
+
+    __slots__ = ("name", "year", "rating_kp", "rating_imdb", "link", "poster", "description")
+
+    def __init__(self, name, year, rating_kp, rating_imdb, link, poster, description):
+        self.name = name
+        self.year = year
+        self.rating_kp = rating_kp
+        self.rating_imdb = rating_imdb
+        self.link = link
+        self.poster = poster
+        self.description = description
+
+    def as_dict(self) -> dict:
+        """Return the record in the same shape as search.search_films items."""
+        return {"name": self.name, "year": str(self.year) if self.year else None,
+            "rating_kp": f"{self.rating_kp:.1f}" if self.rating_kp is not None else "N/A",
+            "rating_imdb": f"{self.rating_imdb:.1f}" if self.rating_imdb is not None else "N/A",
+            "links": [self.link] if self.link else [], "posters": [self.poster] if self.poster else [],
+            "description": self.description}
+
+    def __repr__(self):
+        return f"FilmRecord({self.name!r}, {self.year})"
+
+
+def _parse_year(value) -> int:
+    # В films.db год хранится текстом («2023», «2023 год», ...) - берём первые 4 цифры
+    match = re.search(r"\d{4}", str(value or ""))
+    return int(match.group()) if match else 0
+
+
+def _rating(value: float):
+    return None if math.isnan(value) else round(value, 1)
+
+
+class Catalog:
+    """
+    Column-oriented, read-only film catalog.
+
+    Numeric fields live in typed arrays, text fields are indices into a deduplicated string pool.
+    A catalog is either built in memory (crawler side, strings are interned) or loaded from a snapshot
+    file via mmap (bot side): nothing is decoded until a record is accessed, and the mapped pages are
+    shared by every process that loads the same file.
+    """
+
+    def __init__(self, strings, name_idx, desc_idx, link_idx, poster_idx, kp, imdb, years, mapping=None):
+        self._strings = strings  # list[str] or _StringPool
+        self._name_idx = name_idx
+        self._desc_idx = desc_idx
+        self._link_idx = link_idx
+        self._poster_idx = poster_idx
+        self._kp = kp
+        self._imdb = imdb
+        self._years = years
+        self._mapping = mapping
+        self._search_index = None
+
+    # --- Построение ---
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Build a catalog from (name, year, description, page_link, poster_link, kp_rating, imdb_rating) rows.
+        """
+        pool, index = [""], {"": NO_STRING}
+
+        def intern(value):
+            value = sys.intern(str(value).strip()) if value else ""
+            pos = index.get(value)
+            if pos is None:
+                pos = index[value] = len(pool)
+                pool.append(value)
+            return pos
+
+        name_idx, desc_idx, link_idx, poster_idx = (array.array("I") for _ in range(4))
+        kp, imdb, years = array.array("f"), array.array("f"), array.array("H")
+        for name, year, description, link, poster, rating_kp, rating_imdb in rows:
+            name_idx.append(intern(name))
+            desc_idx.append(intern(description))
+            link_idx.append(intern(link))
+            poster_idx.append(intern(poster))
+            kp.append(float(rating_kp) if rating_kp is not None else math.nan)
+            imdb.append(float(rating_imdb) if rating_imdb is not None else math.nan)
+            years.append(_parse_year(year))
+
+        return cls(pool, name_idx, desc_idx, link_idx, poster_idx, kp, imdb, years)
+
+    @classmethod
+    def from_db(cls, path: str = "films.db"):
+        """Build a catalog from the movies table written by something/parser.py."""
+        db = sqlite3.connect(path)
+        try:
+            rows = db.execute("SELECT NAME, YEAR, DESCRIPTION, PAGE_LINK, POSTER_LINK, KP_RATING, IMDB_RATING "
+                              "FROM movies ORDER BY ID")
+            return cls.from_rows(rows)
+        finally:
+            db.close()
+
+    # --- Снапшот ---
+
+    def save(self, path: str):
+        """Write the catalog to a binary snapshot. The file is replaced atomically."""
+        blob = bytearray()
+        offsets = array.array("I", [0])
+        for i in range(len(self._strings)):
+            blob += self._strings[i].encode("utf-8")
+            offsets.append(len(blob))
+
+        years = array.array("H", self._years)
+        if len(years) % 2:
+            years.append(0)
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(self), len(self._strings)))
+            for column in (offsets, self._name_idx, self._desc_idx, self._link_idx, self._poster_idx,
+                           self._kp, self._imdb, years):
+                f.write(_to_le_bytes(column))
+            f.write(blob)
+        os.replace(tmp_path, path)
+        logger.info(f"Catalog snapshot saved to {path}: {len(self)} films, {len(self._strings)} strings")
+
+    @classmethod
+    def load(cls, path: str):
+        """Memory-map a snapshot written by save(). Raises ValueError on a foreign or outdated file."""
+        with open(path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        file_size = len(mapping)
+        view = memoryview(mapping)
+        try:
+            magic, version, n_films, n_strings = _HEADER.unpack_from(view)
+        except struct.error:
+            magic = version = None
+        if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION:
+            view.release()
+            mapping.close()
+            raise ValueError(f"{path} is not a catalog snapshot of version {SNAPSHOT_VERSION}")
+
+        # Размер файла должен покрывать все колонки и строковый пул, иначе снапшот обрезан
+        columns_size = sum(_aligned(size) for size in (4 * (n_strings + 1), *[4 * n_films] * 6, 2 * n_films))
+        blob_start = _HEADER.size + columns_size
+        if file_size < blob_start:
+            view.release()
+            mapping.close()
+            raise ValueError(f"{path} is truncated: {file_size} bytes, columns need {blob_start}")
+
+        pos = _HEADER.size
+
+        def column(fmt, count):
+            nonlocal pos
+            size = struct.calcsize(fmt) * count
+            col = view[pos:pos + size].cast(fmt)
+            pos += _aligned(size)
+            return col
+
+        offsets = column("I", n_strings + 1)
+        name_idx, desc_idx, link_idx, poster_idx = (column("I", n_films) for _ in range(4))
+        kp, imdb = column("f", n_films), column("f", n_films)
+        years = column("H", n_films)
+        blob_size = offsets[n_strings]
+        if file_size < blob_start + blob_size:
+            for col in (offsets, name_idx, desc_idx, link_idx, poster_idx, kp, imdb, years, view):
+                col.release()
+            mapping.close()
+            raise ValueError(f"{path} is truncated: {file_size} bytes, expected {blob_start + blob_size}")
+        strings = _StringPool(view[pos:pos + blob_size], offsets)
+        view.release()
+
+        logger.info(f"Catalog snapshot {path} mapped: {n_films} films")
+        return cls(strings, name_idx, desc_idx, link_idx, poster_idx, kp, imdb, years, mapping=mapping)
+
+    def close(self):
+        """Release the mapping of a loaded snapshot. The catalog must not be used afterwards."""
+        if self._mapping is not None:
+            for col in (self._name_idx, self._desc_idx, self._link_idx, self._poster_idx,
+                        self._kp, self._imdb, self._years):
+                col.release()
+            self._strings.release()
+            self._mapping.close()
+            self._mapping = None
+
+    # --- Доступ ---
+
+    def __len__(self):
+        return len(self._name_idx)
+
+    def __getitem__(self, i: int) -> FilmRecord:
+        s = self._strings
+        return FilmRecord(s[self._name_idx[i]], self._years[i], _rating(self._kp[i]), _rating(self._imdb[i]),
+                          s[self._link_idx[i]], s[self._poster_idx[i]], s[self._desc_idx[i]])
+
+    def name(self, i: int) -> str:
+        return self._strings[self._name_idx[i]]
+
+    def build_search_index(self):
+        """Decode and lowercase the distinct titles. Done lazily by search(), or ahead of time at warm-up."""
+        if self._search_index is None:
+            rows_by_name = {}
+            for i in range(len(self)):
+                rows_by_name.setdefault(self._name_idx[i], []).append(i)
+            self._search_index = [(self._strings[pos].lower(), rows) for pos, rows in rows_by_name.items()]
+
+    def search(self, query: str, limit: int = 15):
+        """Case-insensitive substring search by title. Returns up to `limit` FilmRecord objects."""
+        self.build_search_index()
+        query = query.strip().lower()
+        if not query:
+            return []
+        found = []
+        for name, rows in self._search_index:
+            if query in name:
+                found.extend(rows)
+                if len(found) >= limit:
+                    break
+        return [self[i] for i in sorted(found)[:limit]]
+
+
+class _StringPool:
+    """Lazy string table over the UTF-8 blob of a mapped snapshot."""
+
+    __slots__ = ("_blob", "_offsets", "_cache")
+
+    def __init__(self, blob, offsets):
+        self._blob = blob
+        self._offsets = offsets
+        self._cache = {}
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        value = self._cache.get(i)
+        if value is None:
+            value = self._cache[i] = sys.intern(str(self._blob[self._offsets[i]:self._offsets[i + 1]], "utf-8"))
+        return value
+
+    def release(self):
+        self._cache.clear()
+        self._offsets.release()
+        self._blob.release()
+
+
+def _aligned(size: int) -> int:
+    return size + (-size % 4)
+
+
+def _to_le_bytes(column) -> bytes:
+    if isinstance(column, memoryview):
+        column = array.array(column.format, column)
+    if sys.byteorder != "little":
+        column = array.array(column.typecode, column)
+        column.byteswap()
+    data = column.tobytes()
+    return data + b"\0" * (-len(data) % 4)
+
+
+if __name__ == '__main__':
+    # python catalog.py [films.db] [CATALOG_PATH]
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    db_path = sys.argv[1] if len(sys.argv) > 1 else "films.db"
+    snapshot_path = sys.argv[2] if len(sys.argv) > 2 else CATALOG_PATH
+    Catalog.from_db(db_path).save(snapshot_path)
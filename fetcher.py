@@ -0,0 +1,113 @@
+import logging
+import os
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from search import parse_results, search_films, search_url
+
+logger = logging.getLogger(__name__)
+
+HTTP_TIMEOUT = int(os.getenv("HTTP_TIMEOUT", 10))  # Таймаут лёгкого HTTP-запроса, с
+BROWSER_BACKOFF_MIN = 10 * 60  # После первого челленджа хост идёт сразу в браузер на 10 минут...
+BROWSER_BACKOFF_MAX = 6 * 3600  # ...при повторных - вдвое дольше, но не больше 6 часов
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:138.0) Gecko/20100101 Firefox/138.0",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "ru-RU,ru;q=0.9,en-US;q=0.5",
+    "Referer": "https://www.kinogo.ec/",
+}
+
+# Признаки страниц-проверок антибот-защиты (Cloudflare, DDoS-Guard и т.п.); любой статус, кроме 200, - тоже проверка
+CHALLENGE_MARKERS = ("cf-browser-verification", "challenge-platform", "cf_chl_", "Just a moment...",
+                     "ddos-guard", "Checking your browser", "Проверка браузера")
+# Признаки честной пустой выдачи DLE: браузер тут ничего не добавит
+NOT_FOUND_MARKERS = ("поиск по сайту не дал никаких результатов", "ничего не найдено")
+
+
+class HostState:
+    """What we learned about a host: until when to skip the HTTP tier and how long the next backoff is."""
+
+    __slots__ = ("browser_until", "backoff")
+
+    def __init__(self):
+        self.browser_until = 0.0
+        self.backoff = BROWSER_BACKOFF_MIN
+
+
+_hosts = {}
+
+
+def host_state(host: str) -> HostState:
+    state = _hosts.get(host)
+    if state is None:
+        state = _hosts[host] = HostState()
+    return state
+
+
+def classify_page(status: int, html: str):
+    """
+    Returns (verdict, films): 'ok' with parsed results, 'empty' for a genuine empty result,
+    or 'challenge' when only a real browser can tell.
+
+    Result containers win over any markers: Cloudflare-fronted sites embed challenge-platform scripts
+    into ordinary pages too.
+    """
+    if status == 200:
+        films = parse_results(html)
+        if films:
+            return "ok", films
+    if status != 200 or any(marker in html for marker in CHALLENGE_MARKERS):
+        return "challenge", []
+    lowered = html.lower()
+    if any(marker in lowered for marker in NOT_FOUND_MARKERS):
+        return "empty", []
+    # Ни результатов, ни сообщения «не найдено» - вероятно, выдача строится скриптами
+    return "challenge", []
+
+
+async def fetch_http(url: str):
+    """Plain GET without a browser. Returns (status, html)."""
+    timeout = aiohttp.ClientTimeout(total=HTTP_TIMEOUT)
+    async with aiohttp.ClientSession(timeout=timeout, headers=HEADERS) as session:
+        async with session.get(url) as response:
+            return response.status, await response.text(errors="replace")
+
+
+def _skip_http(host: str, state: HostState, now: float, reason: str):
+    state.browser_until = now + state.backoff
+    logger.info(f"HTTP tier {reason} on {host}, using the browser for {state.backoff // 60} min")
+    state.backoff = min(state.backoff * 2, BROWSER_BACKOFF_MAX)
+
+
+async def fetch_films(query: str):
+    """
+    Tiered search: one plain HTTP request first, the Selenium path (search.search_films) only if the page
+    is an anti-bot challenge, looks empty for no visible reason, or the request itself failed.
+
+    Hosts that failed the HTTP tier recently go straight to the browser; the skip period doubles on repeated
+    failures and resets as soon as a plain request succeeds again.
+
+    Like search.search_films, returns [] for a genuine empty result and None when the search failed.
+    """
+    url = search_url(query)
+    host = urlsplit(url).hostname
+    state = host_state(host)
+    now = time.monotonic()
+
+    if now >= state.browser_until:
+        try:
+            status, html = await fetch_http(url)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            logger.warning(f"HTTP tier failed for {url}: {e}")
+            _skip_http(host, state, now, "failed")
+        else:
+            verdict, films = classify_page(status, html)
+            if verdict != "challenge":
+                state.backoff = BROWSER_BACKOFF_MIN
+                return films
+            _skip_http(host, state, now, "challenged")
+
+    return await search_films(query)
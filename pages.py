@@ -0,0 +1,58 @@
+import secrets
+import time
+
+PAGE_TTL = 30 * 60  # Сколько секунд кнопка «Ещё» остаётся рабочей
+MAX_ENTRIES = 1000  # Ограничение памяти: самые старые результаты вытесняются первыми
+
+
+class ResultStore:
+    """
+    In-memory store of full search results for pagination.
+
+    Each result set gets a short random token that fits into Telegram callback data (64 bytes);
+    entries expire after `ttl` seconds and the oldest ones are evicted beyond `max_entries`.
+    """
+
+    def __init__(self, ttl: int = PAGE_TTL, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}  # token -> (expires_at, films, served offsets), в порядке добавления
+
+    def put(self, films: list) -> str:
+        """Store a result set whose first page (offset 0) has already been shown."""
+        self._prune()
+        token = secrets.token_urlsafe(6)
+        self._entries[token] = (time.monotonic() + self.ttl, films, {0})
+        return token
+
+    def get(self, token: str):
+        """Films stored under `token`, or None if the token is unknown or expired."""
+        entry = self._entries.get(token)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[token]
+            return None
+        return entry[1]
+
+    def claim_page(self, token: str, offset: int, page_size: int) -> bool:
+        """
+        Mark the page at `offset` as served. False if the token is gone, the offset is not a page start
+        inside the result set, or the page has been served already (a repeated or forged callback).
+        """
+        if self.get(token) is None:
+            return False
+        _, films, served = self._entries[token]
+        if not 0 <= offset < len(films) or offset % page_size or offset in served:
+            return False
+        served.add(offset)
+        return True
+
+    def _prune(self):
+        # TTL у всех записей одинаковый, поэтому порядок добавления совпадает с порядком истечения
+        now = time.monotonic()
+        while self._entries:
+            token, (expires_at, _, _) = next(iter(self._entries.items()))
+            if expires_at >= now and len(self._entries) < self.max_entries:
+                break
+            del self._entries[token]
@@ -2,31 +2,101 @@ import logging
 import os
 import random
 import re
+import threading
+import time
 from datetime import datetime
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
-
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Heavy scraping dependencies (selenium, webdriver_manager, bs4) are imported on first use, see _load_scraping_deps()
+BeautifulSoup = webdriver = Options = Service = By = EC = WebDriverWait = ChromeDriverManager = None
+TimeoutException = WebDriverException = None
 
-async def search_films(query: str, savepage: bool = False):
-    """
-    Asynchronously search for films on kinogo.ec and return up to 15 results.
-    Returns a list of dicts: [{name, year, rating_kp, rating_imdb, links, posters, description}.Tools used: selenium, bs4
+DRIVER_POOL_SIZE = int(os.getenv("DRIVER_POOL_SIZE", "1"))  # How many idle browsers to keep between searches
+KINOGO_URL = os.getenv("KINOGO_URL", "http://www.kinogo.ec")  # Point at a local stub site for benchmarks
+
+# Page-load profile: "full" loads the page as a normal browser would, "lean" (opt-in, compare with
+# bench_scraper.py before switching) loads only what the parser needs
+SCRAPER_PROFILE = os.getenv("SCRAPER_PROFILE", "full")
+
+# Requests blocked in the lean profile (CDP Network.setBlockedURLs patterns)
+LEAN_BLOCKED_URLS = [
+    # images, media and fonts
+    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.woff", "*.woff2", "*.ttf", "*.otf",
+    # ads, counters and other third-party scripts
+    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*", "*googlesyndication.com*",
+    "*mc.yandex.ru*", "*an.yandex.ru*", "*yandex.ru/ads*", "*top-fwz1.mail.ru*", "*counter.yadro.ru*",
+    "*liveinternet.ru*", "*adfox*", "*adriver*", "*vk.com/rtrg*",
+]
+
+# JS snippets for the lean profile: result containers only, and transfer stats from the Resource Timing API
+RESULTS_HTML_JS = "return Array.from(document.querySelectorAll('div.shortstory'), e => e.outerHTML).join('')"
+PAGE_METRICS_JS = """
+    const entries = performance.getEntriesByType('navigation').concat(performance.getEntriesByType('resource'));
+    return [entries.reduce((total, e) => total + (e.transferSize || 0), 0), entries.length];
+"""
+
+last_load = {}  # Metrics of the latest search: profile, url, load_ms, bytes, requests
+
+# warm_up() runs in a worker thread while searches run on the event loop. _lock guards only the driver pool
+# and is never held across imports or network I/O; the import flags go up only after every name is bound,
+# so a reader that sees them set can use the names without locking.
+_lock = threading.Lock()
+_install_lock = threading.Lock()  # Serializes ChromeDriverManager().install() into the shared cache
+_parser_loaded = False
+_deps_loaded = False
+_driver_path = None
+_idle_drivers = []
+_launching = 0  # Drivers being started by warm_up() that will go to the pool
+
+
+def _load_parser():
+    """Import bs4 once. Enough for parsing pages fetched without a browser."""
+    global BeautifulSoup, _parser_loaded
+    if _parser_loaded:
+        return
+    # Повторный импорт из другого потока безвреден: модуль уже в sys.modules
+    from bs4 import BeautifulSoup
+    _parser_loaded = True
+
+
+def _load_scraping_deps():
+    """Import the scraping stack once and publish it as module globals."""
+    global webdriver, Options, Service, By, EC, WebDriverWait, ChromeDriverManager
+    global TimeoutException, WebDriverException, _deps_loaded
+    _load_parser()
+    if _deps_loaded:
+        return
+
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.support.ui import WebDriverWait
+    from webdriver_manager.chrome import ChromeDriverManager
+    # Flag goes up only after every name above is bound
+    _deps_loaded = True
+
+
+def _resolve_driver_path() -> str:
+    """Resolve the chromedriver binary once per process. May hit the network, so _lock is not held here."""
+    global _driver_path
+    if _driver_path is None:
+        with _install_lock:
+            if _driver_path is None:
+                _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def _create_driver():
+    """Launch a new headless Chrome with the anti-detection setup."""
+    _load_scraping_deps()
 
-    Args:
-        query (str): Search query
-        savepage (bool): Whether to save the HTML page to temp (./temp) folder
-    """
     # Anti-detection user agents
     user_agents = ["Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/115.0", ]
 
@@ -46,41 +116,202 @@ async def search_films(query: str, savepage: bool = False):
     # Set window size to mimic real browser
     chrome_options.add_argument("--window-size=1920,1080")
 
-    # Initialize WebDriver
-    service = Service(ChromeDriverManager().install())
+    lean = SCRAPER_PROFILE == "lean"
+    if lean:
+        # Return from driver.get() at DOMContentLoaded instead of waiting for every subresource
+        chrome_options.page_load_strategy = "eager"
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        chrome_options.add_argument("--disk-cache-size=1")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+
+    driver = webdriver.Chrome(service=Service(_resolve_driver_path()), options=chrome_options)
+
+    # Override navigator properties to avoid detection
+    driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": """
+            Object.defineProperty(navigator, 'webdriver', {
+                get: () => undefined
+            });
+            window.navigator.chrome = {
+                runtime: {},
+            };
+            Object.defineProperty(navigator, 'plugins', {
+                get: () => [1, 2, 3]
+            });
+            Object.defineProperty(navigator, 'languages', {
+                get: () => ['en-US', 'en']
+            });
+        """})
+
+    if lean:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": True})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LEAN_BLOCKED_URLS})
+    return driver
+
+
+def _acquire_driver():
+    with _lock:
+        if _idle_drivers:
+            return _idle_drivers.pop()
+    return _create_driver()
+
+
+def _release_driver(driver, healthy: bool):
+    """Return a driver to the idle pool, or quit it if the pool is full or the driver is broken."""
+    with _lock:
+        if healthy and len(_idle_drivers) < DRIVER_POOL_SIZE:
+            _idle_drivers.append(driver)
+            return
+    driver.quit()
+    logger.info("WebDriver closed")
+
+
+def warm_up():
+    """
+    Import the scraping stack, resolve chromedriver and pre-launch the idle drivers.
+    Blocking - run it in a thread from async code.
+    """
+    global _launching
+    _load_scraping_deps()
+    while True:
+        # Резервируем место в пуле до запуска, чтобы не превысить DRIVER_POOL_SIZE
+        with _lock:
+            if len(_idle_drivers) + _launching >= DRIVER_POOL_SIZE:
+                break
+            _launching += 1
+        try:
+            driver = _create_driver()
+        finally:
+            with _lock:
+                _launching -= 1
+        _release_driver(driver, healthy=True)
+    logger.info(f"Scraper warmed up: {len(_idle_drivers)} idle driver(s)")
+
+
+def shutdown():
+    """Quit all idle drivers."""
+    with _lock:
+        drivers = _idle_drivers[:]
+        _idle_drivers.clear()
+    for driver in drivers:
+        driver.quit()
+    logger.info("WebDriver pool closed")
+
+
+def search_url(query: str) -> str:
+    return f"{KINOGO_URL}/search/{query.replace(' ', '%20')}"
+
+
+def _record_load(driver, url: str, started: float):
+    """Log and keep in last_load the load time and bytes transferred for the current page."""
+    load_ms = (time.perf_counter() - started) * 1000
+    try:
+        transferred, requests = driver.execute_script(PAGE_METRICS_JS)
+    except Exception:
+        transferred, requests = None, None
+    last_load.clear()
+    last_load.update(profile=SCRAPER_PROFILE, url=url, load_ms=load_ms, bytes=transferred, requests=requests)
+    size = f"{transferred / 1024:.0f} KB" if transferred is not None else "? KB"
+    logger.info(f"Loaded in {load_ms:.0f} ms, {size} over {requests} requests (profile={SCRAPER_PROFILE})")
+
+
+def parse_results(page_source: str) -> list:
+    """
+    Parse a kinogo.ec search page into up to 15 result dicts.
+    Shared by the browser path below and the plain HTTP path in fetcher.py.
+    """
+    _load_parser()
+    soup = BeautifulSoup(page_source, "html.parser")
+    results = []
+
+    # Find search result items
+    items = soup.select("div.shortstory")[:15]
+    logger.info(f"Found {len(items)} search results")
+
+    for item in items:
+        try:
+            # Extract title from shortstory__header
+            title_tag = item.select_one("div.shortstory__header h2")
+            title = title_tag.text.strip() if title_tag else "Unknown"
+
+            # Extract watch link and poster from shortstory__poster
+            watch_link_tag = item.select_one("div.shortstory__poster a")
+            watch_link = watch_link_tag["href"] if watch_link_tag and watch_link_tag.get("href") else ""
+
+            poster_tag = item.select_one("div.shortstory__poster img")
+            poster = poster_tag["data-src"] if poster_tag and poster_tag.get("data-src") else ""
+            if poster and not poster.startswith("http"):
+                poster = f"https://kinogo.ec{poster}"
+
+            # Extract year from shortstory__info-wrapper
+            year = None
+            year_tag = item.select_one("div.shortstory__info-wrapper div span")
+            if year_tag and year_tag.text.strip():
+                year_text = ''.join(filter(lambda x: x.isdigit(), year_tag.text.strip()))
+                # Check if it's a 4-digit number
+                # print(year_text)
+                if re.match(r'^\d{4}$', year_text):
+                    year = year_text
+
+            # Extract description from excerpt
+            description_tag = item.select_one("div.excerpt")
+            description = description_tag.text.strip() if description_tag else ""
+
+            # Extract ratings
+            kp_tag = item.select_one("span.kp")
+            rating_kp = kp_tag.text.replace("KP ", "").strip() if kp_tag else "N/A"
+
+            imdb_tag = item.select_one("span.imdb")
+            rating_imdb = imdb_tag.text.replace("IMDB ", "").strip() if imdb_tag else "N/A"
+
+            # Append result
+            results.append({"name": title, "year": year, "rating_kp": rating_kp, "rating_imdb": rating_imdb,
+                "links": [watch_link] if watch_link else [], "posters": [poster] if poster else [],
+                "description": description})
+
+        except Exception as e:
+            logger.warning(f"Error parsing item: {e}")
+            continue
+
+    return results
+
+
+async def search_films(query: str, savepage: bool = False):
+    """
+    Asynchronously search for films on kinogo.ec and return up to 15 results.
+    Returns a list of dicts: [{name, year, rating_kp, rating_imdb, links, posters, description}.Tools used: selenium, bs4
+    An empty list means the site found nothing; None means the scrape itself failed.
+
+    Args:
+        query (str): Search query
+        savepage (bool): Whether to save the HTML page to temp (./temp) folder
+    """
     driver = None
+    healthy = False
     results = []
 
     try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-
-        # Override navigator properties to avoid detection
-        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": """
-                Object.defineProperty(navigator, 'webdriver', {
-                    get: () => undefined
-                });
-                window.navigator.chrome = {
-                    runtime: {},
-                };
-                Object.defineProperty(navigator, 'plugins', {
-                    get: () => [1, 2, 3]
-                });
-                Object.defineProperty(navigator, 'languages', {
-                    get: () => ['en-US', 'en']
-                });
-            """})
+        driver = _acquire_driver()
 
         # Format the search URL
-        search_url = f"http://www.kinogo.ec/search/{query.replace(' ', '%20')}"
-        logger.info(f"Navigating to {search_url}")
-        driver.get(search_url)
+        url = search_url(query)
+        logger.info(f"Navigating to {url}")
+        started = time.perf_counter()
+        driver.get(url)
 
         # Wait for search results to load
         WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.CSS_SELECTOR, "div.shortstory")))
 
-        # Get page source and parse with BeautifulSoup
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, "html.parser")
+        if SCRAPER_PROFILE == "lean":
+            # Results are in the DOM: stop loading the rest and take only the result containers
+            driver.execute_script("window.stop();")
+        _record_load(driver, url, started)
+
+        # Get page source
+        if SCRAPER_PROFILE == "lean" and not savepage:
+            page_source = driver.execute_script(RESULTS_HTML_JS)
+        else:
+            page_source = driver.page_source
 
         # Save page if requested
         if savepage:
@@ -92,62 +323,24 @@ async def search_films(query: str, savepage: bool = False):
                 f.write(page_source)
             logger.info(f"Page saved to {filename}")
 
-        # Find search result items
-        items = soup.select("div.shortstory")[:15]
-        logger.info(f"Found {len(items)} search results")
-
-        for item in items:
-            try:
-                # Extract title from shortstory__header
-                title_tag = item.select_one("div.shortstory__header h2")
-                title = title_tag.text.strip() if title_tag else "Unknown"
-
-                # Extract watch link and poster from shortstory__poster
-                watch_link_tag = item.select_one("div.shortstory__poster a")
-                watch_link = watch_link_tag["href"] if watch_link_tag and watch_link_tag.get("href") else ""
-
-                poster_tag = item.select_one("div.shortstory__poster img")
-                poster = poster_tag["data-src"] if poster_tag and poster_tag.get("data-src") else ""
-                if poster and not poster.startswith("http"):
-                    poster = f"https://kinogo.ec{poster}"
-
-                # Extract year from shortstory__info-wrapper
-                year = None
-                year_tag = item.select_one("div.shortstory__info-wrapper div span")
-                if year_tag and year_tag.text.strip():
-                    year_text = ''.join(filter(lambda x: x.isdigit(), year_tag.text.strip()))
-                    # Check if it's a 4-digit number
-                    # print(year_text)
-                    if re.match(r'^\d{4}$', year_text):
-                        year = year_text
-
-                # Extract description from excerpt
-                description_tag = item.select_one("div.excerpt")
-                description = description_tag.text.strip() if description_tag else ""
-
-                # Extract ratings
-                kp_tag = item.select_one("span.kp")
-                rating_kp = kp_tag.text.replace("KP ", "").strip() if kp_tag else "N/A"
-
-                imdb_tag = item.select_one("span.imdb")
-                rating_imdb = imdb_tag.text.replace("IMDB ", "").strip() if imdb_tag else "N/A"
-
-                # Append result
-                results.append({"name": title, "year": year, "rating_kp": rating_kp, "rating_imdb": rating_imdb,
-                    "links": [watch_link] if watch_link else [], "posters": [poster] if poster else [],
-                    "description": description})
-
-            except Exception as e:
-                logger.warning(f"Error parsing item: {e}")
-                continue
+        # Parse with BeautifulSoup
+        results = parse_results(page_source)
+        healthy = True
 
     except Exception as e:
-        logger.error(f"Error during scraping: {e}")
+        if TimeoutException is not None and isinstance(e, TimeoutException):
+            # No div.shortstory in time: an empty result, the browser itself is fine
+            logger.info(f"No search results for {query!r}")
+            healthy = True
+        else:
+            logger.error(f"Error during scraping: {e}")
+            results = None
+            # Only WebDriver/session errors mean the browser is broken
+            healthy = WebDriverException is None or not isinstance(e, WebDriverException)
 
     finally:
         if driver:
-            driver.quit()
-            logger.info("WebDriver closed")
+            _release_driver(driver, healthy)
 
     print(results)
 
@@ -1,3 +1,4 @@
+import os
 import sys
 from bs4 import BeautifulSoup
 import requests
@@ -150,3 +151,10 @@ while index_page <= max_pages:
 
 log_print("Парсинг завершен")
 db.close()
+
+# Пишем компактный снапшот каталога, который бот отображает в память при старте
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalog import CATALOG_PATH, Catalog
+
+Catalog.from_db("films.db").save(CATALOG_PATH)
+log_print(f"Снапшот каталога {CATALOG_PATH} записан")